@@ -1,25 +1,97 @@
+import asyncio
+import atexit
+import json
 import os
 import re
 import sys
+import threading
 import time
 import cloudscraper
 import yaml
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from urllib.parse import urlencode
+from functools import lru_cache
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode, urlparse
+from urllib3.util.retry import Retry
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 LOG_FILE = "logs.txt"
+CONFIG_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "qd", "config.json")
+# 缓存中含有 cookie 和推送 token，设置 QD_CONFIG_CACHE=0 可关闭缓存（如在共享或自托管的 CI 上运行时）
+CONFIG_CACHE_ENABLED = os.environ.get("QD_CONFIG_CACHE", "1") != "0"
 LOG_LEVELS = ["TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL"]
+ACCOUNTS_PER_HOST = 4  # 同一主机同时处理的账号数上限
+MAX_WORKERS = 8  # 处理账号的线程数上限
+DEFAULT_RPS = 0.5  # 轮换账号时同一主机每秒开始处理的账号数，即每 2 秒一个
+SIGNED_STATUSES = ("success", "already")  # 计为签到成功的结果状态
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/114.0.0.0 Safari/537.36",
+    "Accept": "*/*",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+    "Connection": "keep-alive",
+}
+
+_FORMHASH_PATTERNS = (
+    re.compile(r"formhash=([a-zA-Z0-9]+)"),
+    re.compile(r'name="formhash"\s+value="([a-zA-Z0-9]+)"'),
+)
+_XML_PRELUDE_RE = re.compile(rb"\s*<\?xml")
+_XML_ENCODING_RE = re.compile(rb"""\s*<\?xml[^>]*?encoding=["']([A-Za-z0-9._-]+)["']""")
+_LXDAYS_RE = re.compile(r'id="lxdays"\s+value="(\d+)"')
+_REWARD_RE = re.compile(r"获得随机奖励\s*(.*?)。")
+
+# 通过环境变量 QD_LOG_LEVEL 设置最低输出级别，默认全部输出
+_LEVEL_INDEX = {name: i for i, name in enumerate(LOG_LEVELS)}
+_MIN_LEVEL = _LEVEL_INDEX.get(os.environ.get("QD_LOG_LEVEL", "TRACE").upper(), 0)
+
+_LOG_FH = None
+_LOG_LOCK = threading.Lock()
+_TS_CACHE = (0, "")  # (秒级时间戳, 格式化后的时间字符串)，同一秒内的日志复用
+
+def _close_log_file():
+    global _LOG_FH
+    with _LOG_LOCK:
+        if _LOG_FH is not None:
+            _LOG_FH.close()
+            _LOG_FH = None
+
+def _enabled(level):
+    return _LEVEL_INDEX.get(level, 2) >= _MIN_LEVEL
 
 def log(msg, level="INFO"):
+    global _LOG_FH, _TS_CACHE
+    if _LEVEL_INDEX.get(level, 2) < _MIN_LEVEL:
+        return
     if level not in LOG_LEVELS:
         level = "INFO"
-    timestamp = datetime.now().strftime("[%Y-%m-%d %H:%M:%S]")
+    sec, timestamp = _TS_CACHE
+    now = int(time.time())
+    if now != sec:
+        timestamp = time.strftime("[%Y-%m-%d %H:%M:%S]", time.localtime(now))
+        _TS_CACHE = (now, timestamp)
     line = f"{timestamp} [{level}] {msg}"
     print(line)
     try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        # 日志文件只打开一次并缓冲写入，退出时统一刷新关闭
+        with _LOG_LOCK:
+            if _LOG_FH is None:
+                _LOG_FH = open(LOG_FILE, "a", encoding="utf-8", buffering=8192)
+                atexit.register(_close_log_file)
+            _LOG_FH.write(line + "\n")
     except Exception:
         pass
 
@@ -75,10 +147,11 @@ def pushplus_send_message(pushplus_config, title, content):
     
     try:
         log(f"发送 PushPlus 通知: {title}", level="INFO")
-        response = requests.get(api_url, params=params, timeout=30)
+        # 使用 POST 提交 JSON，避免长报告超出 URL 长度限制
+        response = SESSION.post(api_url, json=params, timeout=30)
         
         if response.status_code == 200:
-            result = response.json()
+            result = _json_loads(response.content)
             if result.get("code") == 200:
                 msg_id = result.get("data", "未知ID")
                 log(f"PushPlus 消息发送成功，消息ID: {mask_sensitive_data(msg_id)}", level="INFO")
@@ -95,8 +168,7 @@ def pushplus_send_message(pushplus_config, title, content):
         return False
 
 def format_push_content(all_results):
-    content = "多站点论坛签到报告\n"
-    content += "=" * 50 + "\n"
+    parts = ["多站点论坛签到报告\n", "=" * 50 + "\n"]
     
     total_sites = len(all_results)
     total_accounts = 0
@@ -105,27 +177,69 @@ def format_push_content(all_results):
     for site_name, site_data in all_results.items():
         results = site_data["results"]
         total_accounts += len(results)
-        site_success = sum(1 for r in results if "成功" in r or "已签" in r)
+        site_success = sum(1 for r in results if r["status"] in SIGNED_STATUSES)
         total_success += site_success
+        success_rate = site_success / len(results) * 100 if results else 0.0
         
-        content += f"\n🏠 站点: {site_name}\n"
-        content += f"   处理账号: {len(results)} 个\n"
-        content += f"   成功: {site_success} 个\n"
-        content += f"   失败: {len(results) - site_success} 个\n"
-        content += f"   成功率: {site_success/len(results)*100:.1f}%\n"
+        parts.append(f"\n🏠 站点: {site_name}\n")
+        parts.append(f"   处理账号: {len(results)} 个\n")
+        parts.append(f"   成功: {site_success} 个\n")
+        parts.append(f"   失败: {len(results) - site_success} 个\n")
+        parts.append(f"   成功率: {success_rate:.1f}%\n")
         
         for idx, result in enumerate(results, 1):
-            content += f"   {idx}. {result}\n"
+            parts.append(f"   {idx}. {result['msg']}\n")
     
-    content += "\n" + "=" * 50 + "\n"
-    content += f"📊 全局统计: {total_sites} 个站点, {total_accounts} 个账号\n"
-    content += f"✅ 总成功: {total_success}/{total_accounts}\n"
-    content += f"❌ 总失败: {total_accounts - total_success}/{total_accounts}\n"
-    content += f"📈 总成功率: {total_success/total_accounts*100:.1f}%\n"
-    content += "=" * 50 + "\n"
+    total_rate = total_success / total_accounts * 100 if total_accounts else 0.0
+    parts.append("\n" + "=" * 50 + "\n")
+    parts.append(f"📊 全局统计: {total_sites} 个站点, {total_accounts} 个账号\n")
+    parts.append(f"✅ 总成功: {total_success}/{total_accounts}\n")
+    parts.append(f"❌ 总失败: {total_accounts - total_success}/{total_accounts}\n")
+    parts.append(f"📈 总成功率: {total_rate:.1f}%\n")
+    parts.append("=" * 50 + "\n")
     
+    content = "".join(parts)
     return content, total_success, total_accounts
 
+def _load_config_cached(config_path):
+    # 解析结果以 JSON 缓存，并以 [路径, 修改时间, 大小] 为键；配置未改动时直接读取 JSON，跳过 YAML 解析
+    if not CONFIG_CACHE_ENABLED:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return yaml.load(f, Loader=_YamlLoader)
+
+    st = os.stat(config_path)
+    key = [os.path.abspath(config_path), st.st_mtime_ns, st.st_size]
+    try:
+        with open(CONFIG_CACHE_FILE, "rb") as f:
+            cached = _json_loads(f.read())
+        if cached["key"] == key:
+            config = cached["config"]
+            log("配置文件未变化，使用缓存的解析结果", level="DEBUG")
+            return config
+    except Exception:
+        pass
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = yaml.load(f, Loader=_YamlLoader)
+
+    # 缓存含敏感信息，目录和文件仅当前用户可读写；写入失败时删除临时文件
+    tmp_path = f"{CONFIG_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        data = json.dumps({"key": key, "config": config}, ensure_ascii=False)
+        os.makedirs(os.path.dirname(CONFIG_CACHE_FILE), mode=0o700, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, CONFIG_CACHE_FILE)
+    except Exception as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        if _enabled("DEBUG"):
+            log(f"写入配置缓存失败: {e}", level="DEBUG")
+    return config
+
 def load_config(config_path):
     if not os.path.exists(config_path):
         with open(config_path, "w", encoding="utf-8") as f:
@@ -142,7 +256,9 @@ def load_config(config_path):
                 "          formhash: \"def456\"  # 为特定账号设置固定 formhash\n"
                 "    options:\n"
                 "      rotate_accounts: true\n"
-                "      timeout: 15\n\n"
+                "      timeout: 15\n"
+                "      # rps: 0.5  # 可选：轮换账号时同一主机每秒处理的账号数，默认 0.5（每 2 秒一个）\n"
+                "      # cloudflare: true  # 可选：站点启用了 Cloudflare 质询时强制使用 cloudscraper，默认自动检测\n\n"
                 "  - name: \"站点2名称\"\n"
                 "    url: \"https://example2.com\"\n"
                 "    auth:\n"
@@ -161,8 +277,7 @@ def load_config(config_path):
         log("未找到 config.yaml，已创建多站点模板，请填写后重试。", level="FATAL")
         raise FileNotFoundError("未找到 config.yaml，已创建多站点模板，请填写后重试。")
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+    config = _load_config_cached(config_path)
 
     sites_config = []
     if "sites" in config:
@@ -203,8 +318,22 @@ def load_config(config_path):
         else:
             accounts = []
             
-        options = site.get("options", {})
         site_name = site.get("name", "未命名站点")
+        options = site.get("options") or {}
+        if not isinstance(options, dict):
+            log(f"站点 '{site_name}' 的 options 格式无效，已使用默认设置", level="WARN")
+            options = {}
+        options = dict(options)
+        if "rps" in options:
+            try:
+                rps = float(options["rps"])
+            except (TypeError, ValueError):
+                rps = None
+            # rps 必须为正数，0 或负数不表示「不限速」
+            if rps is None or not rps > 0:
+                log(f"站点 '{site_name}' 的 rps 无效: {options['rps']!r}，已使用默认值 {DEFAULT_RPS}", level="WARN")
+                rps = DEFAULT_RPS
+            options["rps"] = rps
         
         if not base_url:
             log(f"站点 '{site_name}' 的 url 为空，已跳过", level="ERROR")
@@ -251,59 +380,186 @@ def load_config(config_path):
     return validated_sites, pushplus_config
 
 def parse_cookie(cookie_str):
-    cookies = {}
-    for item in cookie_str.split(";"):
-        if "=" in item:
-            k, v = item.strip().split("=", 1)
-            cookies[k.strip()] = v.strip()
-    # 隐藏 cookie 值，只显示键
-    masked_keys = list(cookies.keys())
-    log(f"解析 cookie: 共 {len(masked_keys)} 个键", level="TRACE")
+    cookies = {
+        k.strip(): v.strip()
+        for k, sep, v in (item.partition("=") for item in cookie_str.split(";"))
+        if sep and k.strip()
+    }
+    # 隐藏 cookie 值，只显示键数量
+    if _enabled("TRACE"):
+        log(f"解析 cookie: 共 {len(cookies)} 个键", level="TRACE")
     return cookies
 
-def fetch_formhash(base_url, cookies, headers, timeout):
-    scraper = cloudscraper.create_scraper()
+class SharedCookiePolicy(DefaultCookiePolicy):
+    # 会话在所有账号间共享，只保留 Cloudflare 验证 cookie，账号 cookie 每次请求单独携带，避免串号
+    def set_ok(self, cookie, request):
+        if not cookie.name.startswith(("cf_", "__cf")):
+            return False
+        return super().set_ok(cookie, request)
+
+# 503 是 Cloudflare 质询的状态码，需要原样返回以便检测，不在此重试
+HTTP_RETRY = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 504], raise_on_status=False)
+
+def create_session():
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.cookies.set_policy(SharedCookiePolicy())
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=HTTP_RETRY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def create_scraper(session):
+    # 沿用会话的请求头和 cookie；复用 cloudscraper 自带的 TLS 适配器，只调整连接池大小和重试策略
+    scraper = cloudscraper.create_scraper(sess=session)
+    adapter = scraper.get_adapter("https://")
+    adapter.max_retries = HTTP_RETRY
+    adapter.init_poolmanager(16, 32)
+    return scraper
+
+def is_cloudflare_challenge(resp):
+    return resp.status_code in (403, 503) and "cf-ray" in resp.headers
+
+class SiteClient:
+    # 按站点选择请求方式：默认使用普通会话，只有遇到 Cloudflare 质询（或配置 cloudflare: true）时才启用 cloudscraper，
+    # 检测结果在本站点后续账号中沿用
+    def __init__(self, session, cloudflare=None):
+        self.session = session
+        self.cloudflare = cloudflare
+        self._scraper = None
+        self._lock = threading.Lock()
+
+    def _get_scraper(self):
+        with self._lock:
+            if self._scraper is None:
+                self._scraper = create_scraper(self.session)
+            return self._scraper
+
+    def get(self, url, **kwargs):
+        if self.cloudflare:
+            return self._get_scraper().get(url, **kwargs)
+        resp = self.session.get(url, **kwargs)
+        if self.cloudflare is None and is_cloudflare_challenge(resp):
+            log(f"检测到 Cloudflare 质询，切换为 cloudscraper: {urlparse(url).netloc}", level="INFO")
+            self.cloudflare = True
+            resp.close()
+            return self._get_scraper().get(url, **kwargs)
+        return resp
+
+    def close(self):
+        if self._scraper is not None:
+            self._scraper.close()
+
+class HostRateLimiter:
+    # 按主机限速：相邻两次放行至少间隔 1/rps 秒，未超速时不等待
+    # 只在事件循环中使用，由调用方 await asyncio.sleep 等待，不占用工作线程
+    def __init__(self, rps):
+        self.min_interval = 1 / rps
+        self.next_allowed = 0.0
+
+    def reserve(self):
+        # 预约下一个放行时刻，返回还需等待的秒数
+        now = time.monotonic()
+        delay = self.next_allowed - now
+        self.next_allowed = max(now, self.next_allowed) + self.min_interval
+        return max(delay, 0.0)
+
+SESSION = create_session()
+
+def iter_text_windows(resp, chunk_size=8192, tail_size=256):
+    # 流式读取响应文本，每次产出「上一块末尾 + 新块」，避免匹配内容被分块切断
+    if resp.encoding is None:
+        resp.encoding = "utf-8"
+    tail = ""
+    for chunk in resp.iter_content(chunk_size=chunk_size, decode_unicode=True):
+        window = tail + chunk
+        yield window
+        tail = window[-tail_size:]
+
+def fetch_formhash(client, base_url, cookies, headers, timeout):
     log(f"访问论坛首页获取 formhash: {base_url}", level="INFO")
+    formhash = days = None
     try:
-        resp = scraper.get(base_url, headers=headers, cookies=cookies, timeout=timeout)
-        log(f"访问论坛首页成功，响应长度: {len(resp.text)}", level="DEBUG")
+        resp = client.get(base_url, headers=headers, cookies=cookies, timeout=timeout, stream=True)
+        if _enabled("DEBUG"):
+            log(f"访问论坛首页成功，状态码: {resp.status_code}", level="DEBUG")
+        # 边下载边匹配，找到 formhash 后不再读取页面剩余部分
+        with resp:
+            window = ""
+            for window in iter_text_windows(resp):
+                # 部分模板在首页也带有连续签到天数，顺便取出以省去一次请求
+                if days is None:
+                    m = _LXDAYS_RE.search(window)
+                    if m:
+                        days = m.group(1)
+                for pattern in _FORMHASH_PATTERNS:
+                    m = pattern.search(window)
+                    # 命中位置紧贴窗口末尾时 formhash 可能被截断，留到下一个窗口再匹配
+                    if m and m.end() < len(window):
+                        formhash = m.group(1)
+                        break
+                if formhash:
+                    break
+            else:
+                # 页面已读完，最后一个窗口之后不再有数据，紧贴末尾的匹配即为完整的 formhash
+                for pattern in _FORMHASH_PATTERNS:
+                    m = pattern.search(window)
+                    if m:
+                        formhash = m.group(1)
+                        break
     except Exception as e:
         log(f"访问论坛首页失败: {e}", level="ERROR")
         raise RuntimeError(f"无法访问论坛首页：{e}")
 
-    html = resp.text
-    patterns = [
-        r"formhash=([a-zA-Z0-9]+)",
-        r'name="formhash"\s+value="([a-zA-Z0-9]+)"'
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, html)
-        if m:
-            formhash = m.group(1)
+    if formhash:
+        if _enabled("INFO"):
             log(f"formhash 获取成功: {mask_sensitive_data(formhash)}", level="INFO")
-            return formhash
+        return formhash, days
     log("未找到 formhash", level="WARN")
     raise ValueError("未找到 formhash，请检查登录状态或网页结构。")
 
-def fetch_continuous_days(base_url, cookies, headers, timeout):
-    scraper = cloudscraper.create_scraper()
+def fetch_continuous_days(client, base_url, cookies, headers, timeout):
     sign_page = f"{base_url}/k_misign-sign.html"
     try:
-        resp = scraper.get(sign_page, headers=headers, cookies=cookies, timeout=timeout)
-        html = resp.text
-        m = re.search(r'<input type="hidden" class="hidnum" id="lxdays" value="(\d+)">', html)
-        if m:
-            days = m.group(1)
-            log(f"连续签到天数获取成功: {days}", level="INFO")
-            return days
-        else:
-            log("未找到连续签到天数", level="WARN")
-            return None
+        resp = client.get(sign_page, headers=headers, cookies=cookies, timeout=timeout, stream=True)
+        with resp:
+            for window in iter_text_windows(resp):
+                m = _LXDAYS_RE.search(window)
+                if m:
+                    days = m.group(1)
+                    log(f"连续签到天数获取成功: {days}", level="INFO")
+                    return days
+        log("未找到连续签到天数", level="WARN")
+        return None
     except Exception as e:
         log(f"访问签到页失败: {e}", level="ERROR")
         return None
 
-def sign_account(base_url, account_config, timeout, account_num, site_name):
+@lru_cache(maxsize=None)
+def compile_response_re(encoding):
+    # 把签到状态标记和连续天数合并为一个按响应编码匹配原始字节的正则，一次扫描完成分类
+    # 状态标记用零宽前瞻捕获、不消耗字符，互相重叠（如「已签到成功」「今日已签到」）时也都能匹配到
+    def enc(text):
+        return re.escape(text.encode(encoding))
+    return re.compile(
+        b"(?=(?P<already>" + enc("今日已签") + b"))"
+        + b"|(?=(?P<success>" + enc("签到成功") + b"))"
+        + b"|(?=(?P<signed>" + enc("已签到") + b"))"
+        + rb'|id="lxdays"\s+value="(?P<lxdays>\d+)"'
+    )
+
+def iter_body_encodings(resp, body):
+    # 按优先级列出响应可能的编码：响应头声明的编码 → XML 声明中的编码 → 内容检测结果 → UTF-8
+    # Discuz 的 ajax 响应以 application/xml 返回且不带 charset，此时 resp.encoding 为 None
+    if resp.encoding:
+        yield resp.encoding
+    m = _XML_ENCODING_RE.match(body[:100])
+    if m:
+        yield m.group(1).decode("ascii")
+    yield resp.apparent_encoding
+    yield "utf-8"
+
+def sign_account(client, base_url, account_config, timeout, account_num, site_name):
     cookie_str = account_config["cookies"]
     custom_formhash = account_config.get("formhash", "")
     
@@ -313,56 +569,78 @@ def sign_account(base_url, account_config, timeout, account_num, site_name):
     
     cookies = parse_cookie(cookie_str)
     headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/114.0.0.0 Safari/537.36",
         "Referer": base_url + "/",
         "Origin": base_url,
-        "Accept": "*/*",
-        "Accept-Language": "zh-CN,zh;q=0.9",
-        "Connection": "keep-alive",
     }
 
     # 优先使用自定义 formhash，如果未设置则自动获取
+    page_days = None
     if custom_formhash:
         formhash = custom_formhash
-        log(f"使用自定义 formhash: {mask_sensitive_data(formhash)}", level="INFO")
+        if _enabled("INFO"):
+            log(f"使用自定义 formhash: {mask_sensitive_data(formhash)}", level="INFO")
     else:
         try:
-            formhash = fetch_formhash(base_url, cookies, headers, timeout)
+            formhash, page_days = fetch_formhash(client, base_url, cookies, headers, timeout)
         except Exception as e:
             msg = f"第 {account_num} 个账号 formhash 获取失败: {e}"
             log(msg, level="ERROR")
-            return msg
+            return {"status": "fail", "msg": msg, "days": None}
 
     url = f"{base_url}/k_misign-sign.html?operation=qiandao&format=button&formhash={formhash}"
     log(f"发送签到请求", level="INFO")
-    scraper = cloudscraper.create_scraper()
     try:
-        resp = scraper.get(url, headers=headers, cookies=cookies, timeout=timeout)
-        log(f"签到请求成功，响应长度: {len(resp.text)}", level="DEBUG")
+        resp = client.get(url, headers=headers, cookies=cookies, timeout=timeout)
+        if _enabled("DEBUG"):
+            log(f"签到请求成功，响应长度: {len(resp.content)}", level="DEBUG")
     except Exception as e:
         msg = f"第 {account_num} 个账号请求失败: {e}"
         log(msg, level="ERROR")
-        return msg
+        return {"status": "fail", "msg": msg, "days": None}
+
+    body = resp.content
+    # 依次尝试候选编码，跳过未知或无法表示中文的编码（如 text/* 默认的 ISO-8859-1）
+    for encoding in iter_body_encodings(resp, body):
+        try:
+            response_re = compile_response_re(encoding)
+            break
+        except (TypeError, LookupError, UnicodeEncodeError):
+            continue
+
+    # 每类标记只记录首次出现，全部找到后提前结束扫描
+    found = {}
+    for m in response_re.finditer(body):
+        found.setdefault(m.lastgroup, m)
+        if len(found) == 4:
+            break
 
-    text = resp.text.strip()
     if resp.status_code == 200:
-        if text.startswith("<?xml") and "今日已签" in text:
+        if "already" in found and _XML_PRELUDE_RE.match(body):
+            status = "already"
             msg = "✅ 今日已签，明日再来~"
-        elif "签到成功" in text and "已签到" in text:
-            m = re.search(r"获得随机奖励\s*(.*?)。", text)
+        elif "success" in found and "signed" in found:
+            # 分类完成后再提取奖励，只解码奖励文字所在的片段
+            start = body.find("获得随机奖励".encode(encoding))
+            m = _REWARD_RE.search(body[start:].decode(encoding, "replace")) if start >= 0 else None
             reward = m.group(1) if m else "未知奖励"
+            status = "success"
             msg = f"🎉 签到成功，奖励：{reward}"
         else:
+            status = "unknown"
             msg = f"❓ 未知响应"
-            log(f"未知签到响应内容: {text[:200]}", level="WARN")
+            log(f"未知签到响应内容: {body.lstrip()[:200].decode(encoding, 'replace')}", level="WARN")
     else:
+        status = "fail"
         msg = f"❌ 签到失败，状态码：{resp.status_code}"
         log(msg, level="ERROR")
 
-    # 获取连续签到天数
-    days = fetch_continuous_days(base_url, cookies, headers, timeout)
+    # 获取连续签到天数：优先从签到响应中解析；今日已签时首页的天数仍然有效；都没有再单独请求签到页
+    if "lxdays" in found:
+        days = found["lxdays"].group("lxdays").decode()
+    elif status == "already" and page_days:
+        days = page_days
+    else:
+        days = fetch_continuous_days(client, base_url, cookies, headers, timeout)
     if days:
         msg += f" | 连续签到: {days} 天"
     else:
@@ -370,9 +648,9 @@ def sign_account(base_url, account_config, timeout, account_num, site_name):
 
     print(f"📝 站点 '{site_name}' 第 {account_num} 个账号结果: {msg}")
     log(msg, level="INFO")
-    return msg
+    return {"status": status, "msg": msg, "days": int(days) if days else None}
 
-def sign_site(site_config):
+async def sign_site(session, site_config, host_limit, rate_limiter):
     site_name = site_config["name"]
     base_url = site_config["url"]
     account_list = site_config["accounts"]
@@ -385,22 +663,68 @@ def sign_site(site_config):
     print(f"📋 账号数量: {len(account_list)}")
     print(f"{'='*60}")
     
-    results = []
-    for idx, account_config in enumerate(account_list, 1):
-        result = sign_account(base_url, account_config, timeout, idx, site_name)
-        results.append(result)
-        if options.get("rotate_accounts", True) and idx < len(account_list):
-            print("⏳ 等待 2 秒后处理下一个账号...")
-            time.sleep(2)
+    client = SiteClient(session, options.get("cloudflare"))
+
+    async def run_account(idx, account_config, limiter=None):
+        # 限速等待在协程中进行，不占用工作线程和主机并发名额
+        if limiter is not None:
+            delay = limiter.reserve()
+            if delay > 0:
+                if _enabled("DEBUG"):
+                    log(f"限速等待 {delay:.1f} 秒", level="DEBUG")
+                await asyncio.sleep(delay)
+        async with host_limit:
+            return await asyncio.to_thread(
+                sign_account, client, base_url, account_config, timeout, idx, site_name
+            )
+
+    try:
+        if options.get("rotate_accounts", True):
+            # 轮换账号时逐个处理，并按主机限速；等待期间其他站点照常进行
+            results = [
+                await run_account(idx, account_config, rate_limiter)
+                for idx, account_config in enumerate(account_list, 1)
+            ]
+        else:
+            results = await asyncio.gather(
+                *(run_account(idx, account_config) for idx, account_config in enumerate(account_list, 1))
+            )
+    finally:
+        client.close()
     
     # 统计本站点成功/失败情况
-    success_count = sum(1 for r in results if "成功" in r or "已签" in r)
+    success_count = sum(1 for r in results if r["status"] in SIGNED_STATUSES)
     fail_count = len(results) - success_count
     
     print(f"\n📊 站点 '{site_name}' 统计: 成功 {success_count}/{len(results)} | 失败 {fail_count}/{len(results)}")
     
     return results
 
+async def sign_all_sites(session, sites_config):
+    # 账号请求在线程池中执行，线程数按账号总数设定，不超过 MAX_WORKERS；asyncio.run 结束时会关闭线程池
+    total_accounts = sum(len(site_config["accounts"]) for site_config in sites_config)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(MAX_WORKERS, total_accounts), thread_name_prefix="qd")
+    )
+    # 同一主机上的站点共用一个限速器，取各站点中最小的 rps，即最保守的设置
+    host_rps = {}
+    for site_config in sites_config:
+        host = urlparse(site_config["url"]).netloc
+        host_rps.setdefault(host, []).append(site_config["options"].get("rps", DEFAULT_RPS))
+    host_limits = {}
+    rate_limiters = {}
+    for host, rps_list in host_rps.items():
+        if len(set(rps_list)) > 1:
+            log(f"主机 {host} 上的站点 rps 设置不一致: {sorted(set(rps_list))}，统一使用 {min(rps_list)}", level="WARN")
+        host_limits[host] = asyncio.Semaphore(ACCOUNTS_PER_HOST)
+        rate_limiters[host] = HostRateLimiter(min(rps_list))
+
+    tasks = []
+    for site_config in sites_config:
+        host = urlparse(site_config["url"]).netloc
+        tasks.append(sign_site(session, site_config, host_limits[host], rate_limiters[host]))
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
 def main():
     start_time = datetime.now()
     print("🚀 开始执行多站点论坛签到脚本...")
@@ -418,38 +742,35 @@ def main():
     all_results = {}
     total_accounts = 0
     
-    for site_config in sites_config:
+    # 各站点并发处理，结果顺序与配置顺序一致
+    site_results = asyncio.run(sign_all_sites(SESSION, sites_config))
+    for site_config, results in zip(sites_config, site_results):
         site_name = site_config["name"]
         total_accounts += len(site_config["accounts"])
         
-        try:
-            results = sign_site(site_config)
-            all_results[site_name] = {
-                "results": results,
-                "url": site_config["url"]
-            }
-        except Exception as e:
-            error_msg = f"站点 '{site_name}' 处理异常: {e}"
+        if isinstance(results, Exception):
+            error_msg = f"站点 '{site_name}' 处理异常: {results}"
             log(error_msg, level="ERROR")
             all_results[site_name] = {
-                "results": [f"❌ 处理异常: {e}"],
+                "results": [{"status": "fail", "msg": f"❌ 处理异常: {results}", "days": None}],
                 "url": site_config["url"],
                 "error": True
             }
-        
-        if len(sites_config) > 1:
-            print("\n⏳ 等待 3 秒后处理下一个站点...")
-            time.sleep(3)
+        else:
+            all_results[site_name] = {
+                "results": results,
+                "url": site_config["url"]
+            }
 
     execution_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print("\n" + "🎊 多站点最终签到结果汇总 ".ljust(70, "="))
     
     for site_name, site_data in all_results.items():
         results = site_data["results"]
-        success_count = sum(1 for r in results if "成功" in r or "已签" in r)
+        success_count = sum(1 for r in results if r["status"] in SIGNED_STATUSES)
         print(f"\n🏠 {site_name}: 成功 {success_count}/{len(results)}")
         for idx, res in enumerate(results, 1):
-            print(f"   {idx}. {res}")
+            print(f"   {idx}. {res['msg']}")
     
     print("=" * 70)
     
@@ -471,5 +792,7 @@ def main():
         else:
             print("❌ PushPlus 推送发送失败")
 
+    SESSION.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file